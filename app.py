@@ -4,61 +4,347 @@ import plotly.express as px
 import plotly.graph_objects as go
 import os
 import glob
+import hashlib
+import re
+from collections import Counter
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+import pyarrow as pa
+from pyarrow import csv as pacsv
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from kernels import keyword_date_kernel
 
 # 1. 페이지 설정 (Wide Mode)
 st.set_page_config(page_title="Naver API 유형별 통합 분석 대시보드 v3", layout="wide")
 
 # 2. 데이터 로드 및 전처리 (캐싱 처리)
+CACHE_VERSION = 5  # 캐시에 저장되는 내용(컬럼/타입/변환 규칙)이 바뀌면 올려서 기존 캐시 무효화
+# 데이터 유형 (반환 순서: blog, shop, trend, news)
+TABLE_KINDS = ('blog', 'shop', 'shopping_trend', 'news')
+# 예: blog_오버사이즈_선글라스_20260213.csv → ('blog', '오버사이즈_선글라스')
+FILENAME_RE = re.compile(r'^(?P<kind>blog|shopping_trend|shop|news)_(?P<kw>.+)_\d+\.csv$')
+# 유형별 날짜 컬럼과 포맷 (포맷을 고정해 dateutil 추론 경로를 피함, news는 RFC-2822)
+DATE_COLUMNS = {
+    'blog': ('postdate', '%Y%m%d'),
+    'shopping_trend': ('period', '%Y-%m-%d'),
+    'news': ('pubDate', '%a, %d %b %Y %H:%M:%S %z'),
+}
+# 유형별로 대시보드에서 사용하는 컬럼만 읽음 (날짜는 문자열로 읽어 포맷 지정 변환)
+READ_COLUMNS = {
+    'blog': {'postdate': pa.string(), 'bloggername': pa.string(), 'title': pa.string(), 'description': pa.string()},
+    'shop': {'lprice': pa.int64(), 'brand': pa.string()},
+    'shopping_trend': {'period': pa.string(), 'ratio': pa.float64()},
+    'news': {'pubDate': pa.string(), 'title': pa.string()},
+}
+# 유형별 category 변환 대상 컬럼
+CATEGORY_COLUMNS = {
+    'blog': ('target_keyword', 'bloggername'),
+    'shop': ('target_keyword', 'brand'),
+    'shopping_trend': ('target_keyword',),
+    'news': ('target_keyword',),
+}
+
+def _cache_paths(data_dir, files):
+    # 파일 목록 + 최종 수정시각으로 캐시 키 생성 (CSV가 바뀌면 자동으로 새 캐시)
+    key = repr((CACHE_VERSION, sorted(files), max(os.path.getmtime(f) for f in files)))
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()[:12]
+    return [os.path.join(data_dir, f'_cache_{digest}_{name}.parquet') for name in TABLE_KINDS]
+
+def _date_spans(tables):
+    # 유형별 날짜 컬럼의 (최소, 최대, 결측 여부)를 로드 시 한 번만 계산
+    spans = {}
+    for kind, df in zip(TABLE_KINDS, tables):
+        col = DATE_COLUMNS.get(kind, (None,))[0]
+        if col is not None and col in df:
+            spans[kind] = (df[col].min(), df[col].max(), bool(df[col].isna().any()))
+    return spans
+
 @st.cache_data
 def load_and_preprocess_data():
     data_dir = 'data'
-    files = glob.glob(os.path.join(data_dir, '*.csv'))
+    files = sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+    if not files:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), {}
+    
+    # Parquet 캐시가 있으면 CSV 파싱 없이 바로 로드
+    cache_paths = _cache_paths(data_dir, files)
+    if all(os.path.exists(p) for p in cache_paths):
+        try:
+            tables = tuple(pd.read_parquet(p, engine='pyarrow') for p in cache_paths)
+            return (*tables, _date_spans(tables))
+        except Exception:
+            pass  # 손상된 캐시는 무시하고 CSV에서 다시 생성
     
-    blog_list, shop_list, trend_list, news_list = [], [], [], []
+    # 유형별 Arrow Table 목록 (파일명 접두사 → 리스트)
+    parts = {kind: [] for kind in TABLE_KINDS}
     
     for f in files:
         filename = os.path.basename(f)
         
-        # 키워드 추출 로직 (v3: rsplit을 사용하여 날짜 접미사 제거)
-        keyword = ""
-        if 'blog_' in filename:
-            keyword = filename.replace('blog_', '').rsplit('_', 1)[0]
-        elif 'shopping_trend_' in filename:
-            keyword = filename.replace('shopping_trend_', '').rsplit('_', 1)[0]
-        elif 'shop_' in filename:
-            keyword = filename.replace('shop_', '').rsplit('_', 1)[0]
-        elif 'news_' in filename:
-            keyword = filename.replace('news_', '').rsplit('_', 1)[0]
-        else:
+        # 키워드 추출 로직 (v3: 정규식 한 번으로 유형/키워드 추출, 날짜 접미사 제거)
+        m = FILENAME_RE.match(filename)
+        if not m:
             continue
+        kind, keyword = m.group('kind'), m.group('kw')
             
         try:
-            df = pd.read_csv(f)
-            df['target_keyword'] = keyword
-            
-            if 'blog_' in filename:
-                df['postdate'] = pd.to_datetime(df['postdate'], format='%Y%m%d', errors='coerce')
-                blog_list.append(df)
-            elif 'shopping_trend' in filename:
-                df['period'] = pd.to_datetime(df['period'], errors='coerce')
-                trend_list.append(df)
-            elif 'shop_' in filename:
-                shop_list.append(df)
-            elif 'news_' in filename:
-                df['pubDate'] = pd.to_datetime(df['pubDate'], errors='coerce')
-                news_list.append(df)
+            cols = READ_COLUMNS[kind]
+            convert_options = pacsv.ConvertOptions(include_columns=list(cols), column_types=cols,
+                                                   strings_can_be_null=True)
+            tbl = pacsv.read_csv(f, convert_options=convert_options)
+            # 키워드 컬럼은 사전 인코딩으로 추가 → pandas 변환 시 바로 category
+            kw_col = pa.DictionaryArray.from_arrays(pa.array(np.zeros(tbl.num_rows, dtype='int32')), pa.array([keyword]))
+            parts[kind].append(tbl.append_column('target_keyword', kw_col))
         except Exception as e:
             st.error(f"Error loading {filename}: {e}")
+    
+    # Arrow에서 청크 단위로 이어 붙인 뒤 pandas로 한 번만 변환 (중간 DataFrame 복사 없음)
+    tables = {kind: pa.concat_tables(tbls, promote_options='default').to_pandas(split_blocks=True, self_destruct=True)
+              if tbls else pd.DataFrame() for kind, tbls in parts.items()}
+    
+    # 날짜 변환은 파일별이 아닌 유형별로 한 번만 수행
+    for kind, (col, fmt) in DATE_COLUMNS.items():
+        if not tables[kind].empty:
+            tables[kind][col] = pd.to_datetime(tables[kind][col], format=fmt, errors='coerce', cache=True)
+    
+    # 반복 문자열 컬럼은 category로 변환 (isin/groupby가 정수 코드로 동작, 메모리 절감)
+    for kind, cols in CATEGORY_COLUMNS.items():
+        for col in cols:
+            if col in tables[kind]:
+                # Arrow 사전 컬럼은 파일 순서대로 범주가 합쳐지므로 항상 정렬된 범주로 맞춤
+                cat_col = tables[kind][col].astype('category')
+                tables[kind][col] = cat_col.cat.reorder_categories(sorted(cat_col.cat.categories))
+    
+    tables = tuple(tables[kind] for kind in TABLE_KINDS)
+    
+    # 다음 실행을 위해 Parquet 캐시 저장 (이전 캐시는 정리)
+    try:
+        for old in glob.glob(os.path.join(data_dir, '_cache_*.parquet')):
+            if old not in cache_paths:
+                os.remove(old)
+        for df, p in zip(tables, cache_paths):
+            df.to_parquet(p, engine='pyarrow', compression='zstd')
+    except Exception:
+        pass  # 읽기 전용 환경 등에서는 캐시 없이 동작
             
-    return (pd.concat(blog_list, ignore_index=True) if blog_list else pd.DataFrame(),
-            pd.concat(shop_list, ignore_index=True) if shop_list else pd.DataFrame(),
-            pd.concat(trend_list, ignore_index=True) if trend_list else pd.DataFrame(),
-            pd.concat(news_list, ignore_index=True) if news_list else pd.DataFrame())
+    return (*tables, _date_spans(tables))
+
+def _selected_codes(col, keywords):
+    # 선택 키워드 → category 코드 (정렬, 코드 배열과 같은 dtype)
+    cats = col.cat.categories
+    return np.sort(np.array([cats.get_loc(k) for k in keywords if k in cats], dtype=col.cat.codes.dtype))
+
+def keyword_mask(df, keywords):
+    # category 코드 기준 키워드 필터 (문자열 해싱 대신 정수 코드 비교)
+    if df.empty:
+        return np.zeros(len(df), dtype=bool)
+    col = df['target_keyword']
+    return np.isin(col.cat.codes.to_numpy(), _selected_codes(col, keywords))
+
+def top_k_by(df, col, k, ascending=False):
+    # 상위 k개만 필요하므로 전체 정렬 대신 argpartition(O(N)) 후 k개만 정렬 (결측값 제외)
+    df = df[df[col].notna()]
+    if len(df) > k:
+        values = df[col].values
+        idx = np.argpartition(values, k - 1)[:k] if ascending else np.argpartition(values, -k)[-k:]
+        df = df.iloc[idx]
+    return df.sort_values(col, ascending=ascending)
+
+def grouped_stats(codes, values, with_sumsq=True):
+    # 그룹 코드 기준 정렬 1회 + reduceat으로 count/sum/sumsq/min/max 계산
+    # (음수 코드 = 결측 범주, NaN 값은 제외, with_sumsq=False면 sumsq는 None)
+    # min/max는 원래 dtype(정수 가격 등) 그대로, sum/sumsq만 float64로 계산
+    raw = np.asarray(values)
+    values = raw.astype('float64', copy=False)
+    valid = (codes >= 0) & ~np.isnan(values)
+    codes, values, raw = codes[valid], values[valid], raw[valid]
+    if len(codes) == 0:
+        empty, empty_raw = np.array([], dtype='float64'), raw[:0]
+        return np.array([], dtype=int), empty, empty, empty if with_sumsq else None, empty_raw, empty_raw
+    order = np.argsort(codes, kind='stable')
+    codes, values, raw = codes[order], values[order], raw[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    n = np.diff(np.r_[starts, len(codes)])
+    sumsq = np.add.reduceat(values * values, starts) if with_sumsq else None
+    return (codes[starts], n, np.add.reduceat(values, starts), sumsq,
+            np.minimum.reduceat(raw, starts), np.maximum.reduceat(raw, starts))
+
+def keyword_date_mask(df, kind, span, keywords, start_ts, end_ts):
+    # 키워드 + 기간 필터를 Numba 커널 한 번으로 계산 (중간 bool 배열 없는 단일 패스)
+    # 선택 기간이 데이터 전체 기간(span)을 덮으면(기본값) 키워드 필터만 적용
+    if df.empty:
+        return np.zeros(0, dtype=bool)
+    if span is not None:
+        lo, hi, has_na = span
+        if not has_na and start_ts <= lo and end_ts > hi:
+            return keyword_mask(df, keywords)
+    col = df['target_keyword']
+    times = df[DATE_COLUMNS[kind][0]].to_numpy().astype('datetime64[ns]', copy=False).view('i8')
+    out = np.empty(len(df), dtype=np.bool_)
+    keyword_date_kernel(col.cat.codes.to_numpy(), times, _selected_codes(col, keywords),
+                        start_ts.value, end_ts.value, out)
+    return out
+
+LINE_MAX_POINTS = 1000  # 키워드별 라인 차트 최대 전송 점 수
+HIST_BINS = 64
+HIST_CLIP_Q = 0.005  # 히스토그램 범위 클리핑 분위수 (양쪽)
+TFIDF_N_FEATURES = 2 ** 20  # HashingVectorizer 해시 공간 크기
+TFIDF_VOCAB_SAMPLE = 2000  # 버킷→단어 역매핑에 사용할 샘플 문서 수
+TFIDF_CHUNK_SIZE = 4096  # TF-IDF 스트리밍 처리 청크 크기
+TFIDF_KEEP_NNZ = 5_000_000  # 1차 순회의 청크 행렬을 재사용할 최대 0이 아닌 원소 수 (초과 시 2차에서 다시 해싱)
+
+def lttb_indices(x, y, n_out):
+    # LTTB(Largest-Triangle-Three-Buckets): 선 모양을 유지하며 n_out개 점의 인덱스 선택
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        cx, cy = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+@st.cache_data
+def trend_line_figure(_df, key, title):
+    # 키워드별로 LTTB 축소 후 WebGL trace 구성 (전송량 O(N) → O(LINE_MAX_POINTS), SVG 노드 생성 없음)
+    fig = go.Figure()
+    for kw, sub in _df.groupby('target_keyword', observed=True, sort=False):
+        sub = sub.dropna(subset=['period', 'ratio']).sort_values('period')
+        idx = lttb_indices(sub['period'].to_numpy().view('i8'), sub['ratio'].to_numpy(), LINE_MAX_POINTS)
+        fig.add_trace(go.Scattergl(x=sub['period'].iloc[idx], y=sub['ratio'].iloc[idx], mode='lines', name=kw))
+    fig.update_layout(title=title, xaxis_title='날짜', yaxis_title='클릭 지수',
+                      legend_title_text='target_keyword', template='plotly_white')
+    return fig
+
+@st.cache_data
+def overlay_histogram_figure(_df, key, x, color, title, bins=HIST_BINS):
+    # 가격 × 키워드 코드를 histogram2d 한 번으로 집계해 키워드별 막대로 전달
+    # (전송량 O(N) → O(bins × 키워드 수), 극단값은 분위수 범위로 클리핑해 양 끝 구간에 포함)
+    values = _df[x].to_numpy(dtype='float64')
+    col = _df[color]
+    codes = col.cat.codes.to_numpy()
+    valid = ~np.isnan(values) & (codes >= 0)
+    values, codes = values[valid], codes[valid]
+    lo, hi = np.quantile(values, [HIST_CLIP_Q, 1 - HIST_CLIP_Q]) if len(values) else (0.0, 1.0)
+    if hi <= lo:
+        hi = lo + 1
+    edges = np.linspace(lo, hi, bins + 1)
+    centers, widths = (edges[:-1] + edges[1:]) / 2, np.diff(edges)
+    n_cat = len(col.cat.categories)
+    H, _, _ = np.histogram2d(np.clip(values, lo, hi), codes, bins=[edges, np.arange(n_cat + 1)])
+    fig = go.Figure()
+    for i in np.flatnonzero(H.sum(axis=0)):
+        fig.add_trace(go.Bar(x=centers, y=H[:, i], width=widths, name=col.cat.categories[i], opacity=0.5))
+    fig.update_layout(barmode='overlay', bargap=0, title=title, xaxis_title=x, yaxis_title='count',
+                      legend_title_text=color)
+    return fig
+
+@st.cache_data
+def box_summary_figure(_df, key, x, y, color, title):
+    # 상자그림 5수 요약을 서버에서 계산 (점 단위 전송 생략, 수염은 min/max)
+    q = _df.groupby([color, x], observed=True, sort=False)[y].quantile([0, 0.25, 0.5, 0.75, 1]).unstack()
+    fig = go.Figure()
+    for kw, sub in q.groupby(level=0, observed=True, sort=False):
+        fig.add_trace(go.Box(x=list(sub.index.get_level_values(1)), lowerfence=sub[0].to_numpy(),
+                             q1=sub[0.25].to_numpy(), median=sub[0.5].to_numpy(), q3=sub[0.75].to_numpy(),
+                             upperfence=sub[1].to_numpy(), name=kw))
+    fig.update_layout(boxmode='group', title=title, xaxis_title=x, yaxis_title=y, legend_title_text=color)
+    return fig
+
+# 탭별 집계 캐싱: `_`로 시작하는 DataFrame 인자는 해싱에서 제외하고,
+# 필터 조건(key = 키워드 튜플, 시작/종료 시각)으로만 결과를 구분
+@st.cache_data
+def _compute_trend_desc(_df, key):
+    kw = _df['target_keyword']
+    g, n, total, sumsq, lo, hi = grouped_stats(kw.cat.codes.to_numpy(), _df['ratio'].to_numpy())
+    mean = total / n
+    # 표본 표준편차 (ddof=1, pandas std와 동일)
+    var = np.where(n > 1, (sumsq - n * mean ** 2) / np.maximum(n - 1, 1), np.nan)
+    return pd.DataFrame({'target_keyword': kw.cat.categories[g], 'mean': mean,
+                         'std': np.sqrt(np.clip(var, 0, None)), 'min': lo, 'max': hi})
+
+@st.cache_data
+def _compute_blogger_top(_df, key, n=20):
+    counts = _df['bloggername'].value_counts(sort=False)
+    return top_k_by(counts[counts > 0].reset_index(), 'count', n)
+
+def _iter_texts(values):
+    # 결측값(NaN/None)을 ''로 바꾸며 순회 (fillna로 N 크기 사본을 만들지 않음)
+    return (s if isinstance(s, str) else '' for s in values)
+
+def _iter_text_chunks(texts, chunk_size=TFIDF_CHUNK_SIZE):
+    # 문서를 청크 단위로 순회 (전체 문자열 목록/CSR 행렬을 한 번에 만들지 않음)
+    values = texts.values
+    for i in range(0, len(values), chunk_size):
+        yield _iter_texts(values[i:i + chunk_size])
+
+@st.cache_data
+def _compute_tfidf_ranking(_texts, key, top_k):
+    # 어휘 사전 없이 고정 크기 해시 공간으로 벡터화 (고유 토큰 수와 무관하게 메모리 일정)
+    hv = HashingVectorizer(n_features=TFIDF_N_FEATURES, alternate_sign=False, norm=None)
+    
+    # 1차 순회: 버킷별 문서 빈도 누적 → smooth idf (TfidfTransformer 기본값과 동일)
+    # 말뭉치가 작으면(0이 아닌 원소 TFIDF_KEEP_NNZ개 이하) 청크 행렬을 보관해 2차 순회의 토큰화/해싱을 생략
+    doc_freq, n_docs = np.zeros(TFIDF_N_FEATURES), 0
+    kept, kept_nnz = [], 0
+    for chunk in _iter_text_chunks(_texts):
+        X = hv.transform(chunk)
+        doc_freq += np.bincount(X.indices, minlength=TFIDF_N_FEATURES)
+        n_docs += X.shape[0]
+        if kept is not None:
+            kept_nnz += X.nnz
+            if kept_nnz <= TFIDF_KEEP_NNZ:
+                kept.append(X)
+            else:
+                kept = None
+    idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+    
+    # 2차 순회: 청크별 tf-idf(l2 정규화) 후 CSR data/indices로 열 합계만 누적
+    scores = np.zeros(TFIDF_N_FEATURES)
+    chunks = kept if kept is not None else (hv.transform(chunk) for chunk in _iter_text_chunks(_texts))
+    for X in chunks:
+        X.data *= idf[X.indices]
+        X = normalize(X, norm='l2', copy=False)
+        scores += np.bincount(X.indices, weights=X.data, minlength=TFIDF_N_FEATURES)
+    top_idx = np.argpartition(scores, -top_k)[-top_k:]
+    top_idx = top_idx[scores[top_idx] > 0]
+    
+    # 해시 버킷 → 단어 역매핑: 샘플 문서의 토큰만 다시 해싱해 상위 버킷의 대표 단어 복원
+    # (버킷 충돌 시 샘플에서 가장 자주 나온 토큰을 대표로, 점수는 충돌 토큰의 합일 수 있음)
+    analyzer = hv.build_analyzer()
+    token_counts = Counter(tok for doc in _iter_texts(_texts.values[:TFIDF_VOCAB_SAMPLE]) for tok in analyzer(doc))
+    tokens = sorted(token_counts, key=lambda tok: (-token_counts[tok], tok))
+    bucket_names = {}
+    if tokens:
+        buckets = np.asarray(hv.transform(tokens).argmax(axis=1)).ravel()
+        for tok, bucket in zip(tokens, buckets):
+            bucket_names.setdefault(bucket, tok)
+    top_idx = [i for i in top_idx if i in bucket_names]
+    return pd.DataFrame({'keyword': [bucket_names[i] for i in top_idx], 'score': scores[top_idx]})
+
+@st.cache_data
+def _compute_brand_summary(_df, key, n=50):
+    # (brand, target_keyword) 복합 코드로 한 번에 집계
+    brand, kw = _df['brand'], _df['target_keyword']
+    b_codes, k_codes = brand.cat.codes.to_numpy().astype('int64'), kw.cat.codes.to_numpy().astype('int64')
+    n_kw = len(kw.cat.categories)
+    codes = np.where((b_codes >= 0) & (k_codes >= 0), b_codes * n_kw + k_codes, -1)
+    g, counts, total, _, lo, hi = grouped_stats(codes, _df['lprice'].to_numpy(), with_sumsq=False)
+    brand_summary = pd.DataFrame({'brand': brand.cat.categories[g // n_kw], 'target_keyword': kw.cat.categories[g % n_kw],
+                                  'mean': total / counts, 'min': lo, 'max': hi, 'count': counts})
+    return top_k_by(brand_summary, 'count', n)
 
 # 데이터 로딩
-blog_df, shop_df, trend_df, news_df = load_and_preprocess_data()
+blog_df, shop_df, trend_df, news_df, date_spans = load_and_preprocess_data()
 
 # 3. 사이드바 (Sidebar Filters)
 st.sidebar.title("🔍 분석 설정")
@@ -67,8 +353,7 @@ all_keywords = sorted(trend_df['target_keyword'].unique().tolist()) if not trend
 selected_keywords = st.sidebar.multiselect("분석 키워드 선택", all_keywords, default=all_keywords[:3] if len(all_keywords) > 3 else all_keywords)
 
 if not trend_df.empty:
-    min_date = trend_df['period'].min()
-    max_date = trend_df['period'].max()
+    min_date, max_date, _ = date_spans['shopping_trend']
     date_range = st.sidebar.date_input("분석 기간", [min_date, max_date], min_value=min_date, max_value=max_date)
 else:
     date_range = []
@@ -76,16 +361,20 @@ else:
 # 데이터 필터링 로직
 if len(date_range) == 2:
     start_date, end_date = date_range
-    f_trend = trend_df[(trend_df['target_keyword'].isin(selected_keywords)) & 
-                       (trend_df['period'].dt.date >= start_date) & 
-                       (trend_df['period'].dt.date <= end_date)]
-    f_blog = blog_df[(blog_df['target_keyword'].isin(selected_keywords)) & 
-                     (blog_df['postdate'].dt.date >= start_date) & 
-                     (blog_df['postdate'].dt.date <= end_date)]
-    f_news = news_df[news_df['target_keyword'].isin(selected_keywords)]
-    f_shop = shop_df[shop_df['target_keyword'].isin(selected_keywords)]
+    # datetime64 그대로 비교 (.dt.date 객체 배열 생성 방지), 종료일은 하루 끝까지 포함
+    start_ts, end_ts = pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta('1D')
+    kw_key = tuple(sorted(selected_keywords))
+    f_trend = trend_df[keyword_date_mask(trend_df, 'shopping_trend', date_spans.get('shopping_trend'),
+                                         selected_keywords, start_ts, end_ts)]
+    f_blog = blog_df[keyword_date_mask(blog_df, 'blog', date_spans.get('blog'),
+                                       selected_keywords, start_ts, end_ts)]
+    f_news = news_df[keyword_mask(news_df, selected_keywords)]
+    f_shop = shop_df[keyword_mask(shop_df, selected_keywords)]
 else:
+    kw_key, start_ts, end_ts = None, None, None
     f_trend, f_blog, f_shop, f_news = trend_df, blog_df, shop_df, news_df
+# 캐시 키: 날짜 필터가 적용되는 trend/blog는 기간 포함, shop/news는 키워드만
+filter_key = (kw_key, start_ts, end_ts)
 
 # 4. 메인 화면 구성
 st.title("🛡️ Naver API 유형별 통합 분석 대시보드 v3")
@@ -97,13 +386,11 @@ tab1, tab2, tab3, tab4 = st.tabs(["📉 트렌드 탐색기", "✍️ 블로그
 with tab1:
     st.header("1. 유형별 검색 트렌드 비교")
     if not f_trend.empty:
-        fig1 = px.line(f_trend, x='period', y='ratio', color='target_keyword',
-                       title="선글라스 유형별 검색 비율 추이", labels={'ratio': '클릭 지수', 'period': '날짜'},
-                       template="plotly_white")
+        fig1 = trend_line_figure(f_trend, filter_key, "선글라스 유형별 검색 비율 추이")
         st.plotly_chart(fig1, key='fig1_trend', width='stretch')
         
         st.subheader("표 1: 키워드별 기술 통계 요약")
-        trend_desc = f_trend.groupby('target_keyword')['ratio'].agg(['mean', 'std', 'min', 'max']).reset_index()
+        trend_desc = _compute_trend_desc(f_trend, filter_key)
         st.dataframe(trend_desc, width='stretch')
     else:
         st.info("비교할 키워드를 선택해 주세요.")
@@ -115,7 +402,7 @@ with tab2:
         col_b1, col_b2 = st.columns(2)
         with col_b1:
             st.subheader("그래프 2: 포스팅 빈도 상위 블로거")
-            blogger_top = f_blog['bloggername'].value_counts().head(20).reset_index()
+            blogger_top = _compute_blogger_top(f_blog, filter_key)
             fig2 = px.bar(blogger_top, x='count', y='bloggername', orientation='h', 
                           title="포스팅 빈도 상위 블로거", color='count')
             fig2.update_layout(yaxis={'categoryorder':'total ascending'})
@@ -124,9 +411,7 @@ with tab2:
         with col_b2:
             st.subheader("그래프 3: 핵심 키워드 트리맵 (TF-IDF)")
             try:
-                tfidf_vec = TfidfVectorizer(max_features=30)
-                tfidf_mat = tfidf_vec.fit_transform(f_blog['description'].fillna(''))
-                ranking = pd.DataFrame({'keyword': tfidf_vec.get_feature_names_out(), 'score': np.asarray(tfidf_mat.sum(axis=0)).flatten()})
+                ranking = _compute_tfidf_ranking(f_blog['description'], ('blog', filter_key), 30)
                 fig3 = px.treemap(ranking, path=['keyword'], values='score', color='score', 
                                   title="블로그 데이터 핵심 키워드")
                 st.plotly_chart(fig3, key='fig3_tfidf', width='stretch')
@@ -135,7 +420,7 @@ with tab2:
 
         st.markdown("---")
         st.subheader("표 2: 최신 블로그 포스팅 목록 (20건)")
-        st.dataframe(f_blog[['postdate', 'bloggername', 'title', 'target_keyword']].sort_values('postdate', ascending=False).head(20), width='stretch')
+        st.dataframe(f_blog[['postdate', 'bloggername', 'title', 'target_keyword']].nlargest(20, 'postdate'), width='stretch')
     else:
         st.info("데이터가 없습니다.")
 
@@ -146,21 +431,22 @@ with tab3:
         col_s1, col_s2 = st.columns(2)
         with col_s1:
             st.subheader("그래프 4: 유형별 가격 분포 히스토그램")
-            fig4 = px.histogram(f_shop, x='lprice', color='target_keyword', barmode='overlay', 
-                                title="가격대별 상품 분포 (Overlaid)", marginal="rug")
+            fig4 = overlay_histogram_figure(f_shop, kw_key, 'lprice', 'target_keyword', "가격대별 상품 분포 (Overlaid)")
             st.plotly_chart(fig4, key='fig4_shop', width='stretch')
         with col_s2:
             st.subheader("그래프 5: 주요 브랜드별 가격 범위")
-            top_brands = f_shop['brand'].value_counts().head(10).index
-            f_brand = f_shop[f_shop['brand'].isin(top_brands)]
-            fig5 = px.box(f_brand, x='brand', y='lprice', color='target_keyword', 
-                          title="상위 10개 브랜드 가격 편차")
+            # 브랜드 코드로 개수 집계 + 상위 10개 선택 + 마스크를 한 번에 (문자열 비교 없음)
+            brand_codes = f_shop['brand'].cat.codes.to_numpy()
+            brand_counts = np.bincount(brand_codes[brand_codes >= 0], minlength=len(f_shop['brand'].cat.categories))
+            top_codes = np.argpartition(brand_counts, -10)[-10:] if len(brand_counts) > 10 else np.arange(len(brand_counts))
+            top_codes = top_codes[brand_counts[top_codes] > 0]
+            f_brand = f_shop[np.isin(brand_codes, top_codes)]
+            fig5 = box_summary_figure(f_brand, kw_key, 'brand', 'lprice', 'target_keyword', "상위 10개 브랜드 가격 편차")
             st.plotly_chart(fig5, key='fig5_shop_box', width='stretch')
             
         st.markdown("---")
         st.subheader("표 3: 브랜드별 마켓 지표 요약")
-        brand_summary = f_shop.groupby(['brand', 'target_keyword'])['lprice'].agg(['mean', 'min', 'max', 'count']).reset_index()
-        st.dataframe(brand_summary.sort_values('count', ascending=False).head(50), width='stretch')
+        st.dataframe(_compute_brand_summary(f_shop, kw_key), width='stretch')
     else:
         st.info("데이터가 없습니다.")
 
@@ -172,9 +458,7 @@ with tab4:
         with col_n1:
             st.subheader("뉴스 키워드 중요도")
             try:
-                tfidf_vec_n = TfidfVectorizer(max_features=25)
-                tfidf_mat_n = tfidf_vec_n.fit_transform(f_news['title'].fillna(''))
-                ranking_n = pd.DataFrame({'keyword': tfidf_vec_n.get_feature_names_out(), 'score': np.asarray(tfidf_mat_n.sum(axis=0)).flatten()})
+                ranking_n = _compute_tfidf_ranking(f_news['title'], ('news', kw_key), 25)
                 fig6 = px.bar(ranking_n.sort_values('score', ascending=True), x='score', y='keyword', orientation='h', 
                               title="뉴스 헤드라인 주요 키워드", color='score')
                 st.plotly_chart(fig6, key='fig6_news', width='stretch')
@@ -182,7 +466,7 @@ with tab4:
                 st.write("키워드 분석 데이터 부족")
         with col_n2:
             st.subheader("표 4: 최신 뉴스 헤드라인 목록")
-            st.dataframe(f_news[['target_keyword', 'title', 'pubDate']].sort_values('pubDate', ascending=False).head(30), width='stretch')
+            st.dataframe(f_news[['target_keyword', 'title', 'pubDate']].nlargest(30, 'pubDate'), width='stretch')
     else:
         st.info("뉴스 데이터가 없습니다.")
 
@@ -0,0 +1,17 @@
+# Numba 커널 모음
+# Streamlit은 위젯 조작마다 app.py를 다시 실행하므로, 커널을 별도 모듈에 두어
+# 프로세스당 한 번만 컴파일/로드되게 함 (import된 모듈은 재실행 시 재사용)
+# 세션마다 별도 스레드에서 호출되므로 parallel=True는 쓰지 않음 (workqueue 계층은 스레드 안전하지 않음)
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def keyword_date_kernel(codes, times, sel_codes, start_ns, end_ns, out):
+    # 행마다 기간 [start_ns, end_ns) 포함 여부 + 선택 코드 이진 탐색을 한 번에 판정 (NaT는 범위 밖)
+    for i in range(codes.size):
+        hit = False
+        t = times[i]
+        if t >= start_ns and t < end_ns:
+            j = np.searchsorted(sel_codes, codes[i])
+            hit = j < sel_codes.size and sel_codes[j] == codes[i]
+        out[i] = hit